@@ -1,13 +1,39 @@
 #!/usb/bin/env python
 import functools
 import re
+import struct
 
 import gdb.printing
 
 
 def get_string(s):
-    main = str(s).split()[1:]
-    return " ".join(main)[1:-1]
+    if not s:
+        return ""
+    try:
+        return s.string(errors="replace")
+    except gdb.MemoryError:
+        return str(s)
+
+
+#: Number of matrix/constraint rows printed before truncating.
+MAX_ROWS = 8
+#: Number of statements (and dependences) printed before truncating.
+MAX_STMTS = 16
+
+_INT_FORMATS = {1: "b", 2: "h", 4: "i", 8: "q"}
+
+
+def read_ints(ptr, count):
+    """Read `count` integers from the array at `ptr` in one go."""
+    if count <= 0:
+        return ()
+    size = ptr.type.target().sizeof
+    mem = gdb.selected_inferior().read_memory(int(ptr), count * size)
+    return struct.unpack(f"{count}{_INT_FORMATS[size]}", bytes(mem))
+
+
+def more(total, shown):
+    return f"... (+{total - shown} more)"
 
 
 def deref(val):
@@ -22,7 +48,7 @@ class PrinterBase:
     def __init__(self, val):
         self.val = val
 
-    def get_array(self, key, nkey, fn, sep=None):
+    def get_array(self, key, nkey, fn, sep=None, limit=None):
         """Print an array like member.
 
         Arguments:
@@ -39,32 +65,39 @@ class PrinterBase:
             sep[Optional[str]]: What is the separator for the
                 elements.
 
+            limit[Optional[int]]: Maximum number of elements read,
+                the rest is summarised as "... (+N more)".
+
         """
         arr = self.val[key]
         cur = self.val
         for k in nkey.split("->"):
             cur = cur[k]
-        rng = range(int(cur))
-        result = [fn(arr[i]) for i in rng]
+        total = int(cur)
+        shown = total if limit is None else min(total, limit)
+        result = [fn(arr[i]) for i in range(shown)]
+        if shown < total:
+            result.append(more(total, shown))
         if sep:
             return sep.join(result)
         return result
 
     def print_members(self, members):
-        result = ""
+        parts = []
         for member in members:
             if len(member) == 3:
                 tag, key, fn = member
                 if fn == deref and int(self.val[key]) == 0:
                     continue
-                result += f"{tag}:{fn(self.val[key])}; "
+                parts.append(f"{tag}:{fn(self.val[key])}; ")
             elif len(member) == 5:
                 tag, key, nkey, fn, sep = member
                 sstr = sep if sep else ""
-                result += f"{tag}:{sstr}{self.get_array(key, nkey, fn, sep)}; {sstr}"
+                arr = self.get_array(key, nkey, fn, sep)
+                parts.append(f"{tag}:{sstr}{arr}; {sstr}")
             else:
                 raise ValueError(f"Bad members: {members}")
-        return result
+        return "".join(parts)
 
 
 class PlutoProgPrinter(PrinterBase):
@@ -112,13 +145,24 @@ class PlutoProgPrinter(PrinterBase):
         }
         """
         members = [
-            ("stmts", "stmts", "nstmts", sderef, "\n"),  # OK!
-            ("deps", "deps", "ndeps", sderef, "\n"),
-            ("tdeps", "transdeps", "ntransdeps", sderef, "\n"),  # zero
+            ("nstmts", "nstmts", int),  # OK!
             ("dnames", "data_names", "num_data", get_string, None),  # OK!
         ]
-        statement = self.print_members(members)
-        return f"{statement}"
+        parts = [self.print_members(members)]
+        arrays = [("deps", "deps", "ndeps"), ("tdeps", "transdeps", "ntransdeps")]
+        for tag, key, nkey in arrays:
+            deps = self.get_array(key, nkey, sderef, "\n", limit=MAX_STMTS)
+            parts.append(f"{tag}:\n{deps}; \n")
+        return "".join(parts)
+
+    def children(self):
+        """Statements are yielded lazily, gdb only formats what it prints."""
+        stmts = self.val["stmts"]
+        nstmts = int(self.val["nstmts"])
+        for i in range(min(nstmts, MAX_STMTS)):
+            yield f"stmts[{i}]", deref(stmts[i])
+        if nstmts > MAX_STMTS:
+            yield "...", more(nstmts, MAX_STMTS)
 
 
 class PlutoAccessPrinter(PrinterBase):
@@ -140,19 +184,24 @@ class PlutoAccessPrinter(PrinterBase):
 
 class PlutoConstraintPrinter(PrinterBase):
     def to_string(self):
-        buf = self.val["buf"]
         ncols = int(self.val["ncols"])
         nrows = int(self.val["nrows"])
+        alloc_ncols = int(self.val["alloc_ncols"])
         names = self.get_array("names", "ncols", get_string)
+        shown = min(nrows, MAX_ROWS)
+        buf = read_ints(self.val["buf"], shown * alloc_ncols)
+        is_eqs = read_ints(self.val["is_eq"], shown)
         eqs = []
-        for row in range(nrows):
-            is_eq = "=" if bool(self.val["is_eq"][row]) else "<="
-            base = row * int(self.val["alloc_ncols"])
+        for row in range(shown):
+            is_eq = "=" if is_eqs[row] else "<="
+            base = row * alloc_ncols
             terms = [f"0{is_eq}"]
             terms += [
-                f"{buf[base + i]}{names[i]}" for i in range(ncols) if int(buf[base + i])
+                f"{buf[base + i]}{names[i]}" for i in range(ncols) if buf[base + i]
             ]
-            eqs.append("".join([(t if t[0] == "-" else f"+{t}") for t in terms]))
+            eqs.append("".join(t if t[0] == "-" else f"+{t}" for t in terms))
+        if shown < nrows:
+            eqs.append(more(nrows, shown))
 
         return f"Cntr:{eqs}"
 
@@ -160,13 +209,13 @@ class PlutoConstraintPrinter(PrinterBase):
 class PlutoMatrixPrinter(PrinterBase):
     def to_string(self):
         buf = self.val["val"]
-        cols = range(int(self.val["ncols"]))
-        rows = range(int(self.val["nrows"]))
-        alloc_ncols = int(self.val["alloc_ncols"])
-        rows_strs = []
-        for row in rows:
-            row = [str(buf[row][i]) for i in cols]
-            rows_strs.append(",".join(row))
+        ncols = int(self.val["ncols"])
+        nrows = int(self.val["nrows"])
+        shown = min(nrows, MAX_ROWS)
+        rows = range(shown)
+        rows_strs = [",".join(map(str, read_ints(buf[row], ncols))) for row in rows]
+        if shown < nrows:
+            rows_strs.append(more(nrows, shown))
         return f"{{{'|'.join(rows_strs)}}}"
 
 
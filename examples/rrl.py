@@ -1,23 +1,31 @@
 #!/usr/bin/env python
 import difflib
+import functools
 import json
+import multiprocessing
+import os
 import random
 import subprocess
 import time
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 from subprocess import TimeoutExpired
 
 from tadashi import TRANSFORMATIONS, LowerUpperBound, Scops, TrEnum
 from tadashi.apps import Polybench, Simple
 
+_TR_ITEMS = tuple(TRANSFORMATIONS.items())
+_TILE_SIZES = tuple(2**x for x in range(5, 12))
+
+
+@functools.lru_cache(maxsize=None)
+def _bits_of(mask):
+    return tuple(i for i in range(len(_TR_ITEMS)) if mask >> i & 1)
+
 
 def get_polybench_list():
     base = Path("examples/polybench")
-    result = []
-    for p in base.glob("**"):
-        if Path(p / (p.name + ".c")).exists():
-            result.append(p.relative_to(base))
-    return base, result
+    return base, Polybench.find_benchmarks(base)
 
 
 class Model:
@@ -33,71 +41,91 @@ class Model:
 
     def random_transform(self, scop):
         node = self.random_node(scop)
-        key, tr = random.choice(list(TRANSFORMATIONS.items()))
-
-        while not tr.valid(node):
+        while not node.valid_tr_mask:
             node = self.random_node(scop)
-            key, tr = random.choice(list(TRANSFORMATIONS.items()))
+        key, tr = _TR_ITEMS[random.choice(_bits_of(node.valid_tr_mask))]
 
-        args = self.random_args(node, tr)
+        args = self.random_args(node, key)
         return self.node_idx, key, tr, args
 
-    def random_args(self, node, tr):
-        if tr == TRANSFORMATIONS[TrEnum.TILE]:
-            tile_size = random.choice([2**x for x in range(5, 12)])
-            return [tile_size]
-        lubs = tr.available_args(node)
+    def random_args(self, node, key):
+        if key == TrEnum.TILE:
+            return [random.choice(_TILE_SIZES)]
         args = []
-        for lub in lubs:
+        for lub in node.available_args(key):
             if isinstance(lub, LowerUpperBound):
-                lb, ub = lub
-                if lb is None:
-                    lb = -64
-                if ub is None:
-                    ub = 64
-                args.append(random.randrange(lb, ub))
+                lb = -64 if lub.lower is None else lub.lower
+                ub = 64 if lub.upper is None else lub.upper
+                if ub <= lb:
+                    raise ValueError(f"Empty arg range [{lb}, {ub}) for {key}")
+                # Scaling one float is much cheaper than `randrange()`.
+                args.append(lb + int(random.random() * (ub - lb)))
             else:
-                chosen_enum = random.choice(list(lub))
+                chosen_enum = random.choice(lub)
                 args.append(chosen_enum.value)
 
         return args
 
 
 class Timer:
+    """Collect per-step timings as integer nanoseconds."""
+
     def __init__(self):
         self.times = [{}]
-        self.tick = time.monotonic()
+        self.tick = time.perf_counter_ns()
 
     def time(self, key):
-        t = time.monotonic()
+        t = time.perf_counter_ns()
         self.times[-1][key] = t - self.tick
         self.tick = t
 
     def reset(self):
-        self.tick = time.monotonic()
+        self.tick = time.perf_counter_ns()
 
     def custom(self, key, value):
-        self.times[-1][key] = value
+        """Record `value` given in seconds."""
+        self.times[-1][key] = round(value * 1e9)
 
+    def dump(self, filename):
+        """Write the timings (in seconds) to a JSON file."""
+        times = [{k: v / 1e9 for k, v in step.items()} for step in self.times]
+        with open(filename, "w") as file:
+            json.dump(times, file)
 
-def get_array(app: Polybench):
+
+def get_array(binary: Path):
     result = subprocess.run(
-        app.run_cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, timeout=40
+        [binary], stdout=subprocess.PIPE, stderr=subprocess.PIPE, timeout=40
     )
     output = result.stderr.decode()
     return output.split("\n")
 
 
-def run_model(app, num_steps, name=""):
+def measure_binary(app, binary: Path, timeout=None) -> float:
+    # A persistent binary runs `main` once per input line and exits at EOF.
+    result = subprocess.run(
+        [binary], input=b"\n", stdout=subprocess.PIPE, timeout=timeout
+    )
+    return app.extract_runtime(result.stdout)
+
+
+def run_model(app, num_steps, name="") -> Path:
+    """Randomly transform `app` and measure the result.
+
+    The transformed code is compiled next to `app.output_binary`
+    (which is left untouched), and the path of the new binary is
+    returned.
+
+    """
     model = Model()
     timer = Timer()
     app.compile()
     timer.time("Compilation")
-    app.measure()
-    t = timer.time("Total walltime")
+    t = app.measure()
+    timer.time("Total walltime")
+    timer.custom("Kernel walltime", t)
     scop = app.scops[0]
     timer.time("Extraction")
-    timer.custom("Kernel walltime", t)
     for i in range(num_steps):
         timer.times.append({})
         timer.reset()
@@ -108,46 +136,90 @@ def run_model(app, num_steps, name=""):
         if not legal:
             scop.schedule_tree[loop_idx].rollback()
     timer.reset()
-    app = app.generate_code()
+    new_code = app.scops.generate_code(app.source)
     timer.time("Code generation")
-    app.compile()
+    binary = Path(f"{app.output_binary}.transformed")
+    app.compile_from_stdin(new_code, binary)
     timer.time("Compilation")
     try:
-        t = app.measure(timeout=60)
+        t = measure_binary(app, binary, timeout=60)
         timer.time("Total walltime")
         timer.custom("Kernel walltime", t)
     except TimeoutExpired as e:
         print(f"Timeout expired: {e=}")
     filename = f"./times/{name}-{num_steps}.json"
-    json.dump(timer.times, open(filename, "w"))
+    timer.dump(filename)
     print(f"Written: {filename}")
+    return binary
 
 
 def run_simple():
     run_model(Simple("./examples/depnodep.c"), num_steps=5)
 
 
-def measure_polybench(num_steps):
+def _pin_worker(core_sets):
+    os.sched_setaffinity(0, core_sets.get())
+
+
+def run_parallel(fn, poly, *args, num_workers=None):
+    """Call `fn(p, *args)` for each benchmark `p` in a process pool.
+
+    Each worker is pinned to its own disjoint set of cores, so that
+    concurrent runs do not disturb each other's measurements.  The
+    affinity is inherited by the compiler and the measured binary, so
+    OpenMP kernels run on all cores of their worker.  By default, there
+    is one worker for every two cores, and there are never more workers
+    than cores.  Leftover cores go to the first workers.
+
+    """
+    cores = sorted(os.sched_getaffinity(0))
+    if num_workers is None:
+        num_workers = len(cores) // 2
+    num_workers = max(1, min(num_workers, len(cores)))
+    size, rem = divmod(len(cores), num_workers)
+    queue = multiprocessing.Queue()
+    start = 0
+    for i in range(num_workers):
+        end = start + size + (i < rem)
+        queue.put(set(cores[start:end]))
+        start = end
+    kwargs = {"initializer": _pin_worker, "initargs": (queue,)}
+    with ProcessPoolExecutor(max_workers=num_workers, **kwargs) as pool:
+        futures = [pool.submit(fn, p, *args) for p in poly]
+        return [f.result() for f in futures]
+
+
+def measure_one(p, base, num_steps, seed, persistent):
+    random.seed(f"{seed}-{p.name}")
+    print(f"Start {p.name}")
+    options = ["-DSMALL_DATASET"]
+    app = Polybench(p, base, compiler_options=options, persistent=persistent)
+    run_model(app, num_steps=num_steps, name=p.name)
+    app.close()
+
+
+def measure_polybench(num_steps, seed=42, persistent=False):
     base, poly = get_polybench_list()
-    for i, p in enumerate(poly):
-        print(f"Start {i+1}. {p.name}")
-        app = Polybench(p, base, compiler_options=["-DSMALL_DATASET"])
-        run_model(app, num_steps=num_steps, name=p.name)
+    run_parallel(measure_one, poly, base, num_steps, seed, persistent)
+
+
+def verify_one(p, base, compiler_options, seed):
+    random.seed(f"{seed}-{p.name}")
+    app = Polybench(p, base, compiler_options)
+    app.compile()
+    gold = get_array(app.output_binary)
+    # print(f"{gold[:3]=}")
+    binary = run_model(app, num_steps=3, name=p.name)
+    mod = get_array(binary)
+    print(f"{mod [:3]=}")
+    return "\n".join(difflib.unified_diff(gold, mod))
 
 
-def verify_polybench():
+def verify_polybench(seed=42):
     base, poly = get_polybench_list()
     compiler_options = ["-DSMALL_DATASET", "-DPOLYBENCH_DUMP_ARRAYS"]
-    for p in poly:
-        app = Polybench(p, base, compiler_options)
-        app.compile()
-        gold = get_array(app)
-        # print(f"{gold[:3]=}")
-        run_model(app, num_steps=3, name=p.name)
-        # app.compile()
-        mod = get_array(app)
-        print(f"{mod [:3]=}")
-        diff = "\n".join(difflib.unified_diff(gold, mod))
+    diffs = run_parallel(verify_one, poly, base, compiler_options, seed)
+    for p, diff in zip(poly, diffs):
         if diff:
             print("<<<<<<<<<<<<< ERROR")
             print(diff)
@@ -156,7 +228,6 @@ def verify_polybench():
 
 
 if __name__ == "__main__":
-    random.seed(42)
     # verify_polybench()
     measure_polybench(num_steps=1)
     # measure_polybench(num_steps=10)
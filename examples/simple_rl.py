@@ -22,6 +22,11 @@ import torch.nn.functional as F
 import torch.optim as optim
 import yaml
 
+try:
+    from yaml import CSafeLoader as SafeLoader
+except ImportError:
+    from yaml import SafeLoader
+
 CURRENT_MARK = "CURRENT_"
 
 
@@ -383,11 +388,7 @@ def main():
 
 def get_polybench_list():
     base = Path("examples/polybench/")
-    result = []
-    for p in base.glob("**"):
-        if Path(p / (p.name + ".c")).exists():
-            result.append(p.relative_to(base))
-    return base, result
+    return base, tadashi.apps.Polybench.find_benchmarks(base)
 
 
 def tokenize_isl_str(isl_str: str):
@@ -469,7 +470,7 @@ def traverse(yaml_dict: dict, level: int = 0) -> list:
 def tokenize(node: tadashi.Node, vocab: Optional[list] = None) -> dict:
     pattern = re.compile(r"# YOU ARE HERE\n *")
     yaml_str = re.sub(pattern, CURRENT_MARK, node.yaml_str)
-    yaml_dict = yaml.load(yaml_str, yaml.SafeLoader)
+    yaml_dict = yaml.load(yaml_str, SafeLoader)
     tokens = traverse(yaml_dict)
     if not vocab:
         vocab = ["leaf"]
@@ -32,6 +32,8 @@ void rollback(size_t pool_idx, size_t scop_idx);
 int generate_code(size_t pool_idx, const char *input_path,
                   const char *output_path);
 
+const char *generate_code_str(size_t pool_idx, const char *input_path);
+
 int tile(size_t pool_idx, size_t scop_idx, size_t tile_size);
 
 int interchange(size_t pool_idx, size_t scop_idx);
@@ -35,6 +35,7 @@ public:
 public:
   isl_ctx *ctx;
   std::vector<Scop> scops;
+  std::string generated_code;
 };
 
 class ScopsPool {
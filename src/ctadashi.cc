@@ -180,24 +180,47 @@ generate_code_callback(__isl_take isl_printer *p, struct pet_scop *scop,
   return p;
 }
 
-extern "C" int
-generate_code(size_t pool_idx, const char *input_path,
-              const char *output_path) {
-  int r = 0;
+static int
+write_code(size_t pool_idx, const char *input_path, FILE *output_file) {
   isl_ctx *ctx = SCOPS_POOL[pool_idx].ctx;
-  size_t scop_idx = 0;
 
   //   isl_options_set_ast_print_macro_once(ctx, 1);
   //   pet_options_set_encapsulate_dynamic_control(ctx, 1);
 
-  FILE *output_file = fopen(output_path, "w");
   Scop *si = SCOPS_POOL[pool_idx].scops.data();
-  r = pet_transform_C_source(ctx, input_path, output_file,
-                             generate_code_callback, si);
+  return pet_transform_C_source(ctx, input_path, output_file,
+                                generate_code_callback, si);
+}
+
+extern "C" int
+generate_code(size_t pool_idx, const char *input_path,
+              const char *output_path) {
+  int r = 0;
+  FILE *output_file = fopen(output_path, "w");
+  r = write_code(pool_idx, input_path, output_file);
   fclose(output_file);
   return r;
 }
 
+/// Same as `generate_code` but the code is returned instead of being
+/// written to a file (NULL on failure).
+extern "C" const char *
+generate_code_str(size_t pool_idx, const char *input_path) {
+  int r = 0;
+  char *buf = NULL;
+  size_t size = 0;
+  FILE *output_file = open_memstream(&buf, &size);
+  if (output_file == NULL)
+    return NULL;
+  r = write_code(pool_idx, input_path, output_file);
+  fclose(output_file);
+  SCOPS_POOL[pool_idx].generated_code.assign(buf, size);
+  free(buf);
+  if (r < 0)
+    return NULL;
+  return SCOPS_POOL[pool_idx].generated_code.c_str();
+}
+
 /******** transformations ***********************************/
 
 extern "C" Scop *
@@ -6,10 +6,11 @@
 from __future__ import annotations
 
 import ctypes
+import functools
 import os
 from ast import literal_eval
 from collections import namedtuple
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from enum import Enum, StrEnum, auto
 from pathlib import Path
 from typing import Optional
@@ -110,6 +111,11 @@ class Node:
     #: Index of the children in `Scop.schedule_tree`.
     children_idx: list[str]
 
+    #: Memoized results of `TransformInfo` methods on this node.
+    _tr_cache: dict = field(
+        default_factory=dict, init=False, repr=False, compare=False
+    )
+
     @property
     def parent(self):
         """The node which is the parent of the current node."""
@@ -147,7 +153,7 @@ class Node:
         tr = TRANSFORMATIONS[trkey]
         if len(args) != len(tr.arg_help):
             raise ValueError(f"Incorrect number of args for {tr}!")
-        if not tr.valid(self):
+        if not self.valid_transformation(trkey):
             msg = f"Not a valid transformation: {tr}"
             raise ValueError(msg)
         if not tr.valid_args(self, *args):
@@ -156,6 +162,7 @@ class Node:
 
         func = getattr(self.scop.ctadashi, tr.func_name)
         self.scop.locate(self.location)
+        self.scop.invalidate_cache()
         return func(self.scop.pool_idx, self.scop.scop_idx, *args)
 
     @property
@@ -168,19 +175,50 @@ class Node:
 
     def rollback(self) -> None:
         """Roll back (revert) the last transformation."""
+        self.scop.invalidate_cache()
         self.scop.ctadashi.rollback(self.scop.pool_idx, self.scop.scop_idx)
 
-    @property
+    def _cached_tr_info(self, method: str, tr: TrEnum):
+        """Call `TRANSFORMATIONS[tr].method(self)` memoized on the node.
+
+        Nodes are rebuilt whenever the schedule changes (see
+        `Scop.schedule_tree`), so the memo never outlives the node's
+        own data.  Lists are stored as (nested) tuples so callers
+        cannot modify the cached value.
+
+        """
+        key = (method, tr)
+        if key not in self._tr_cache:
+            result = getattr(TRANSFORMATIONS[tr], method)(self)
+            if isinstance(result, list):
+                result = tuple(tuple(r) if isinstance(r, list) else r for r in result)
+            self._tr_cache[key] = result
+        return self._tr_cache[key]
+
     def valid_transformation(self, tr: TrEnum) -> bool:
         """Check the validity of the transformation."""
-        return TRANSFORMATIONS[tr].valid(self)
+        return self._cached_tr_info("valid", tr)
+
+    @functools.cached_property
+    def valid_tr_mask(self) -> int:
+        """Bitmask of valid transformations.
+
+        Bit `i` is set if the `i`-th key of `TRANSFORMATIONS` is valid
+        on the node.
+
+        """
+        mask = 0
+        for i, k in enumerate(TRANSFORMATIONS):
+            if self.valid_transformation(k):
+                mask |= 1 << i
+        return mask
 
     @property
     def available_transformations(self) -> list[TrEnum]:
         """List transformations available at the `Node`."""
         result = []
-        for k, tr in TRANSFORMATIONS.items():
-            if tr.valid(self):
+        for k in TRANSFORMATIONS:
+            if self.valid_transformation(k):
                 result.append(k)
         return result
 
@@ -188,9 +226,9 @@ class Node:
         """Check the validity of args."""
         return TRANSFORMATIONS[tr].valid_args(self, *args)
 
-    def available_args(self, tr: TrEnum) -> list:
+    def available_args(self, tr: TrEnum) -> tuple:
         """Describe available args."""
-        return TRANSFORMATIONS[tr].available_args(self)
+        return self._cached_tr_info("available_args", tr)
 
 
 LowerUpperBound = namedtuple(
@@ -468,6 +506,10 @@ class Scop:
         self.scop_idx = scop_idx
         self.ctadashi = ctadashi
 
+    def invalidate_cache(self):
+        """Drop the cached `schedule_tree` after the schedule changes."""
+        self.__dict__.pop("schedule_tree", None)
+
     def get_loop_signature(self):
         """Extract the value for `Node.loop_signature`.
 
@@ -507,8 +549,14 @@ class Scop:
                 self._traverse(nodes=nodes, parent=current_idx, location=location + [c])
                 self.ctadashi.goto_parent(self.pool_idx, self.scop_idx)
 
-    @property
+    @functools.cached_property
     def schedule_tree(self) -> list[Node]:
+        """All nodes of the schedule tree in depth first order.
+
+        The list is built once and reused until a transformation or
+        rollback invalidates it (see `invalidate_cache`).
+
+        """
         self.ctadashi.goto_root(self.pool_idx, self.scop_idx)
         nodes: list[Node] = []
         self._traverse(nodes, parent=-1, location=[])
@@ -584,6 +632,8 @@ class Scops:
             ctypes.c_char_p,
         ]
         self.ctadashi.generate_code.restype = ctypes.c_int
+        self.ctadashi.generate_code_str.argtypes = [ctypes.c_size_t, ctypes.c_char_p]
+        self.ctadashi.generate_code_str.restype = ctypes.c_char_p
         #
         for tr_name, tr_info in TRANSFORMATIONS.items():
             msg = f"The transformation {tr_name} is not specified correctly!"
@@ -597,14 +647,21 @@ class Scops:
         if not path.exists():
             raise ValueError(f"{path} does not exist!")
 
-    def generate_code(self, input_path, output_path):
+    def generate_code(self, input_path, output_path=None) -> Optional[bytes]:
         """Generate the source code.
 
         The transformations happen on the SCoPs (polyhedral
         representations), and to put that into code, this method needs
         to be called.
 
+        If `output_path` is `None`, nothing is written to disk, the
+        generated code is returned instead.
+
         """
+        if output_path is None:
+            return self.ctadashi.generate_code_str(
+                self.pool_idx, str(input_path).encode()
+            )
         self.ctadashi.generate_code(
             self.pool_idx,
             str(input_path).encode(),
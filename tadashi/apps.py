@@ -1,9 +1,11 @@
 #!/usr/bin/env python
 import datetime
 import os
+import select
 import shutil
 import subprocess
 import tempfile
+import time
 from pathlib import Path
 from typing import Optional
 
@@ -15,6 +17,12 @@ class App:
     source: Path
     compiler_options: list[str]
     ephemeral: bool = False
+    #: Keep the binary running between measurements, see `measure()`.
+    #: Only suitable for apps which print exactly one line (the
+    #: runtime) to stdout per run, such as `Polybench`, and is only
+    #: exposed there (`Simple` apps print other output too).
+    persistent: bool = False
+    _proc: Optional[subprocess.Popen] = None
 
     def _finalize_object(
         self,
@@ -35,6 +43,7 @@ class App:
         return app
 
     def __del__(self):
+        self.close()
         if self.ephemeral:
             self.remove_binary()
             self.remove_source()
@@ -57,8 +66,8 @@ class App:
         raise NotImplementedError()
 
     @staticmethod
-    def extract_runtime(stdout) -> float:
-        """Extract the measured runtime from the output."""
+    def extract_runtime(stdout: bytes) -> float:
+        """Extract the measured runtime from the (undecoded) output."""
         raise NotImplementedError()
 
     @property
@@ -71,18 +80,124 @@ class App:
         """The command which gets executed when we measure runtime."""
         return [self.output_binary]
 
+    @property
+    def persistent_options(self) -> list[str]:
+        """Extra compiler arguments which wrap `main` in a measurement loop."""
+        if not self.persistent:
+            return []
+        driver = Path(__file__).parent / "persistent_main.c"
+        return [str(driver), "-Dmain=tadashi_main"]
+
     def compile(self) -> bool:
         """Compile the app so it can be measured/executed."""
-        result = subprocess.run(self.compile_cmd + self.compiler_options)
+        self.close()
+        cmd = self.compile_cmd + self.persistent_options + self.compiler_options
+        result = subprocess.run(cmd)
+        # raise an exception if it didn't compile
+        result.check_returncode()
+        return result.returncode == 0
+
+    def compile_from_stdin(self, source: bytes, output: Optional[Path] = None) -> bool:
+        """Compile `source` (e.g. `Scops.generate_code()` output) in
+        place of the `source` file, without writing it to disk.
+
+        The result is written to `output` if given, otherwise it
+        overwrites `output_binary`.
+
+        """
+        if source is None:
+            raise ValueError("No source to compile (code generation failed?)")
+        if output is None:
+            output = self.output_binary
+        else:
+            output = Path(output)
+        if output == self.output_binary:
+            self.close()
+        cmd = []
+        replaced = {str(self.source): 0, str(self.output_binary): 0}
+        for arg in self.compile_cmd:
+            if arg == str(self.source):
+                # Quoted includes are still looked up next to the source.
+                cmd += ["-iquote", str(self.source.parent), "-xc", "-", "-xnone"]
+            elif arg == str(self.output_binary):
+                cmd.append(str(output))
+            else:
+                cmd.append(arg)
+            if arg in replaced:
+                replaced[arg] += 1
+        for arg, count in replaced.items():
+            if count != 1:
+                msg = f"{arg} must appear exactly once in {self.compile_cmd}"
+                raise ValueError(msg)
+        cmd += self.persistent_options + self.compiler_options
+        result = subprocess.run(cmd, input=source)
         # raise an exception if it didn't compile
         result.check_returncode()
-        return result == 0
+        return result.returncode == 0
 
     def measure(self, *args, **kwargs) -> float:
-        """Measure the runtime of the app."""
+        """Measure the runtime of the app.
+
+        If the app is `persistent`, the binary is started only once and
+        each measurement asks it to rerun `main`.  In this case only the
+        `timeout` keyword argument is supported.  Call `close()` to stop
+        it.
+
+        """
+        if self.persistent:
+            if args or set(kwargs) - {"timeout"}:
+                msg = "Persistent measure() only supports the timeout argument"
+                raise TypeError(msg)
+            return self._measure_persistent(**kwargs)
         result = subprocess.run(self.run_cmd, stdout=subprocess.PIPE, *args, **kwargs)
-        stdout = result.stdout.decode()
-        return self.extract_runtime(stdout)
+        return self.extract_runtime(result.stdout)
+
+    def _measure_persistent(self, timeout: Optional[float] = None) -> float:
+        if self._proc is None:
+            self._proc = subprocess.Popen(
+                self.run_cmd, stdin=subprocess.PIPE, stdout=subprocess.PIPE
+            )
+        try:
+            self._proc.stdin.write(b"\n")
+            self._proc.stdin.flush()
+        except BrokenPipeError:
+            self._raise_exited()
+        fd = self._proc.stdout.fileno()
+        deadline = None if timeout is None else time.monotonic() + timeout
+        line = b""
+        while not line.endswith(b"\n"):
+            remaining = None if deadline is None else deadline - time.monotonic()
+            if remaining is not None and remaining <= 0:
+                self._stop(kill=True)
+                raise subprocess.TimeoutExpired(self.run_cmd, timeout)
+            ready, _, _ = select.select([fd], [], [], remaining)
+            if not ready:
+                continue
+            chunk = os.read(fd, 4096)
+            if not chunk:
+                self._raise_exited()
+            line += chunk
+        return self.extract_runtime(line)
+
+    def _stop(self, kill: bool = False) -> int:
+        proc, self._proc = self._proc, None
+        if kill:
+            proc.kill()
+        try:
+            proc.stdin.close()
+        except BrokenPipeError:
+            pass
+        proc.stdout.close()
+        return proc.wait()
+
+    def _raise_exited(self):
+        returncode = self._stop()
+        raise subprocess.CalledProcessError(returncode, self.run_cmd)
+
+    def close(self):
+        """Stop the binary started by a persistent `measure()`."""
+        if self._proc is not None:
+            self._stop()
 
 
 class Simple(App):
@@ -100,7 +215,7 @@ class Simple(App):
         ]
 
     @staticmethod
-    def extract_runtime(stdout):
+    def extract_runtime(stdout: bytes):
         num = stdout.split()[1]
         return float(num)
 
@@ -118,15 +233,39 @@ class Simple(App):
         return Simple.make_ephemeral(new_file) if ephemeral else Simple(new_file)
 
 
+def _benchmark_dirs(path):
+    """Yield the directories under `path` containing `<dirname>.c`."""
+    source = os.path.basename(path) + ".c"
+    with os.scandir(path) as entries:
+        for entry in entries:
+            if entry.is_dir(follow_symlinks=False):
+                yield from _benchmark_dirs(entry.path)
+            elif entry.name == source:
+                yield path
+
+
 class Polybench(App):
-    """A single benchmark in of the Polybench suite."""
+    """A single benchmark in of the Polybench suite.
+
+    Pass `persistent=True` to opt in to persistent measurements (off
+    by default): the binary is then started once and rerun for each
+    `measure()` call instead of being executed from scratch.
+    """
 
     benchmark: Path  # path to the benchmark dir from base
     base: Path  # the dir where polybench was unpacked
 
-    def __init__(self, benchmark: str, base: str, infix: str = "", compiler_options=[]):
+    def __init__(
+        self,
+        benchmark: str,
+        base: str,
+        infix: str = "",
+        compiler_options=[],
+        persistent: bool = False,
+    ):
         self.benchmark = Path(benchmark)
         self.base = Path(base)
+        self.persistent = persistent
         dir = self.base / self.benchmark
         source = dir / Path(self.benchmark.name).with_suffix(f".c")
         compiler_options += ["-DPOLYBENCH_TIME", "-DPOLYBENCH_USE_RESTRICT", "-lm"]
@@ -156,15 +295,25 @@ class Polybench(App):
             alt_infix = f".{now_str}"
         new_file = self._source_with_infix(self.source, alt_infix)
         self.scops.generate_code(self.source, new_file)
-        kwargs = {"benchmark": self.benchmark, "base": self.base, "infix": alt_infix}
+        kwargs = {
+            "benchmark": self.benchmark,
+            "base": self.base,
+            "infix": alt_infix,
+            "persistent": self.persistent,
+        }
         return Polybench.make_ephemeral(**kwargs) if ephemeral else Polybench(**kwargs)
 
+    @staticmethod
+    def find_benchmarks(base: str) -> list[Path]:
+        """List the benchmarks under `base`, relative to `base`."""
+        return [Path(p).relative_to(base) for p in _benchmark_dirs(base)]
+
     @staticmethod
     def _source_with_infix(source: Path, infix: str):
         return f"{source.with_suffix('')}{infix}{source.suffix}"
 
     @staticmethod
-    def extract_runtime(stdout) -> float:
+    def extract_runtime(stdout: bytes) -> float:
         result = 0.0
         try:
             result = float(stdout.split()[0])
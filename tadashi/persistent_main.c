@@ -0,0 +1,22 @@
+/* Driver for measuring an app in a single long-lived process.
+ *
+ * The app is compiled with `-Dmain=tadashi_main` and linked with this
+ * file.  Each byte read from stdin runs the original `main` once, the
+ * runtime it prints is flushed so the caller can read it line by line.
+ */
+#include <stdio.h>
+#include <unistd.h>
+
+#undef main
+
+int tadashi_main(int argc, char *argv[]);
+
+int
+main(int argc, char *argv[]) {
+  char c;
+  while (read(0, &c, 1) == 1) {
+    tadashi_main(argc, argv);
+    fflush(stdout);
+  }
+  return 0;
+}
@@ -0,0 +1,20 @@
+#include <stdio.h>
+#include <stdlib.h>
+#include <string.h>
+#include <unistd.h>
+
+// Prints the number of runs so far, so consecutive measurements can
+// tell whether the same process was reused.  With PERSISTENT_APP_MODE
+// set to "hang" or "exit", the second run hangs or exits.
+int
+main(int argc, char *argv[]) {
+  static int runs = 0;
+  const char *mode = getenv("PERSISTENT_APP_MODE");
+  runs++;
+  if (runs == 2 && mode && !strcmp(mode, "hang"))
+    sleep(60);
+  if (runs == 2 && mode && !strcmp(mode, "exit"))
+    exit(1);
+  printf("%d.000000\n", runs);
+  return 0;
+}
@@ -0,0 +1,111 @@
+#!/usr/bin/env python
+import os
+import shutil
+import subprocess
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from tadashi.apps import App, Polybench
+
+
+class GccApp(App):
+    """Minimal app which does not need SCoP extraction."""
+
+    extract_runtime = staticmethod(Polybench.extract_runtime)
+
+    def __init__(self, source, persistent=False):
+        self.source = Path(source)
+        self.compiler_options = []
+        self.persistent = persistent
+
+    @property
+    def compile_cmd(self) -> list[str]:
+        return ["gcc", str(self.source), "-o", str(self.output_binary)]
+
+
+def make_app(testcase, persistent=False):
+    tmpdir = tempfile.TemporaryDirectory()
+    testcase.addCleanup(tmpdir.cleanup)
+    source = Path(tmpdir.name) / "persistent_app.c"
+    shutil.copy(Path(__file__).parent / "persistent_app.c", source)
+    app = GccApp(source, persistent)
+    testcase.addCleanup(app.close)
+    return app
+
+
+class TestCompileFromStdin(unittest.TestCase):
+    def setUp(self):
+        self.app = make_app(self)
+
+    def test_compiles_given_source(self):
+        code = self.app.source.read_bytes().replace(b"runs++;", b"runs += 41;")
+        self.app.compile_from_stdin(code)
+        self.assertEqual(self.app.measure(), 41.0)
+
+    def test_output(self):
+        self.app.compile()
+        output = self.app.output_binary.with_name("transformed")
+        code = self.app.source.read_bytes().replace(b"runs++;", b"runs += 41;")
+        self.app.compile_from_stdin(code, output)
+        result = subprocess.run([output], stdout=subprocess.PIPE)
+        self.assertEqual(self.app.extract_runtime(result.stdout), 41.0)
+        self.assertEqual(self.app.measure(), 1.0)
+
+    def test_no_source(self):
+        self.assertRaises(ValueError, self.app.compile_from_stdin, None)
+
+    def test_source_not_in_compile_cmd(self):
+        cmd = ["gcc", "other.c", "-o", str(self.app.output_binary)]
+        code = b"int main() { return 0; }"
+        with mock.patch.object(GccApp, "compile_cmd", cmd):
+            self.assertRaises(ValueError, self.app.compile_from_stdin, code)
+
+    def test_output_not_in_compile_cmd(self):
+        cmd = ["gcc", str(self.app.source), "-o", "other"]
+        code = b"int main() { return 0; }"
+        with mock.patch.object(GccApp, "compile_cmd", cmd):
+            self.assertRaises(ValueError, self.app.compile_from_stdin, code)
+
+
+class TestPersistentMeasure(unittest.TestCase):
+    def setUp(self):
+        self.app = make_app(self, persistent=True)
+        self.app.compile()
+
+    def test_reuses_process(self):
+        self.assertEqual(self.app.measure(), 1.0)
+        self.assertEqual(self.app.measure(), 2.0)
+        self.assertEqual(self.app.measure(timeout=10), 3.0)
+        self.app.close()
+        self.assertEqual(self.app.measure(), 1.0)
+
+    def test_unsupported_args(self):
+        self.assertRaises(TypeError, self.app.measure, stderr=subprocess.PIPE)
+        self.assertRaises(TypeError, self.app.measure, ["extra"])
+
+    @mock.patch.dict(os.environ, {"PERSISTENT_APP_MODE": "hang"})
+    def test_timeout(self):
+        self.assertEqual(self.app.measure(timeout=10), 1.0)
+        with self.assertRaises(subprocess.TimeoutExpired):
+            self.app.measure(timeout=0.5)
+        self.assertEqual(self.app.measure(timeout=10), 1.0)
+
+    @mock.patch.dict(os.environ, {"PERSISTENT_APP_MODE": "exit"})
+    def test_exit(self):
+        self.assertEqual(self.app.measure(), 1.0)
+        with self.assertRaises(subprocess.CalledProcessError):
+            self.app.measure()
+        self.assertEqual(self.app.measure(), 1.0)
+
+
+class TestFindBenchmarks(unittest.TestCase):
+    def test_find_benchmarks(self):
+        with tempfile.TemporaryDirectory() as base:
+            for path in ["a/gemm/gemm.c", "a/b/lu/lu.c", "a/b/lu/other.c", "x/y.c"]:
+                path = Path(base) / path
+                path.parent.mkdir(parents=True, exist_ok=True)
+                path.touch()
+            found = Polybench.find_benchmarks(base)
+        self.assertEqual(sorted(found), [Path("a/b/lu"), Path("a/gemm")])
@@ -2,6 +2,7 @@
 import ast
 import difflib
 import logging
+import re
 import sys
 import tempfile
 import unittest
@@ -9,11 +10,12 @@ from dataclasses import dataclass, field
 from pathlib import Path
 from typing import Optional
 
-from tadashi import Scops, TrEnum
+from tadashi import TRANSFORMATIONS, NodeType, Scops, TrEnum
 from tadashi.apps import Simple
 
 HEADER = "/// TRANSFORMATION: "
 COMMENT = "///"
+COMMENT_RE = re.compile(rb"^///(?: TRANSFORMATION: (.*)|.?(.*))$", re.MULTILINE)
 
 
 @dataclass
@@ -28,32 +30,29 @@ class TestCtadashi(unittest.TestCase):
 
     @staticmethod
     def _read_app_comments(app):
-        TRANSFORMATION = " TRANSFORMATION: "
         transforms = []
         target_code = []
-        with open(app.source) as file:
-            for commented_line in file:
-                if not commented_line.startswith(COMMENT):
-                    continue
-                line = commented_line.strip().replace(COMMENT, "")
-                if line.startswith(TRANSFORMATION):
-                    transform_str = line.replace(TRANSFORMATION, "")
-                    lits = ast.literal_eval(transform_str)
-                    td = TransformData(*lits[:2], TrEnum(lits[2].lower()), lits[3:])
-                    transforms.append(td)
-                else:
-                    target_line = line[1:] if line else line
-                    target_code.append(target_line)
+        with open(app.source, "rb") as file:
+            data = file.read()
+        for transform_bytes, target_bytes in COMMENT_RE.findall(data):
+            if transform_bytes:
+                transform_str = transform_bytes.decode()
+                lits = ast.literal_eval(transform_str)
+                td = TransformData(*lits[:2], TrEnum(lits[2].lower()), lits[3:])
+                transforms.append(td)
+            else:
+                target_code.append(target_bytes.decode().rstrip())
         return transforms, target_code
 
     def _get_generated_code(self, app: Simple):
         with tempfile.TemporaryDirectory() as tmpdir:
             suffix = Path(app.source).suffix
             outfile = Path(tmpdir) / Path(self._testMethodName).with_suffix(suffix)
-            outfile_bytes = str(outfile).encode()
             app.generate_code(outfile, ephemeral=False)
-            generated_code = Path(outfile_bytes.decode()).read_text().split("\n")
-        return [x for x in generated_code if not x.startswith(COMMENT)]
+            data = outfile.read_bytes()
+        self.assertEqual(app.scops.generate_code(app.source), data)
+        comment = COMMENT.encode()
+        return [x.decode() for x in data.split(b"\n") if not x.startswith(comment)]
 
     def check(self, app_file):
         logger = logging.getLogger(self._testMethodName)
@@ -101,6 +100,52 @@ class TestCtadashi(unittest.TestCase):
         node = self._get_band_node()
         self.assertRaises(ValueError, node.transform, TrEnum.TILE, 2, 3)
 
+    def _check_cached_info(self, scop):
+        for node in scop.schedule_tree:
+            for i, (key, tr) in enumerate(TRANSFORMATIONS.items()):
+                valid = tr.valid(node)
+                self.assertEqual(bool(node.valid_tr_mask >> i & 1), valid)
+                self.assertEqual(node.valid_transformation(key), valid)
+                if valid:
+                    lubs = tr.available_args(node)
+                    lubs = [tuple(a) if isinstance(a, list) else a for a in lubs]
+                    self.assertEqual(list(node.available_args(key)), lubs)
+
+    def test_cache_invalidation(self):
+        app = Simple("tests/py/dummy.c")
+        scop = app.scops[0]
+        tree = scop.schedule_tree
+        self.assertIs(tree, scop.schedule_tree)
+        self._check_cached_info(scop)
+        self.assertFalse(tree[2].valid_transformation(TrEnum.INTERCHANGE))
+
+        tree[1].transform(TrEnum.TILE, 4)
+        tiled = scop.schedule_tree
+        self.assertIsNot(tiled, tree)
+        self.assertEqual(len(tiled), len(tree) + 1)
+        self.assertTrue(tiled[2].valid_transformation(TrEnum.INTERCHANGE))
+        self._check_cached_info(scop)
+
+        tiled[1].rollback()
+        rolled_back = scop.schedule_tree
+        self.assertIsNot(rolled_back, tiled)
+        self.assertEqual(len(rolled_back), len(tree))
+        self.assertFalse(rolled_back[2].valid_transformation(TrEnum.INTERCHANGE))
+        self._check_cached_info(scop)
+
+    def test_stale_node_does_not_poison_cache(self):
+        app = Simple("tests/py/dummy.c")
+        scop = app.scops[0]
+        stale = scop.schedule_tree[3]
+        self.assertEqual(stale.node_type, NodeType.SEQUENCE)
+        scop.schedule_tree[1].transform(TrEnum.TILE, 4)
+        self.assertFalse(stale.valid_transformation(TrEnum.TILE))
+        fresh = scop.schedule_tree[3]
+        self.assertEqual(fresh.location, stale.location)
+        self.assertEqual(fresh.node_type, NodeType.BAND)
+        self.assertTrue(fresh.valid_transformation(TrEnum.TILE))
+        self._check_cached_info(scop)
+
 
 def setup():
     if "-v" in sys.argv:
@@ -23,13 +23,15 @@ plt.rcParams.update(params)
 
 
 def get_raw_df(files):
-    data = {}
+    records = []
     for file in files:
         name = file.with_suffix("").name
-        data[name] = json.load(open(file))
-    df = pd.concat({k: pd.DataFrame(v) for k, v in data.items()})
-    df.index.names = ["Benchmark", "Step"]
-    return df
+        with open(file) as f:
+            steps = json.load(f)
+        for step, row in enumerate(steps):
+            records.append({"Benchmark": name, "Step": step, **row})
+    df = pd.DataFrame.from_records(records)
+    return df.set_index(["Benchmark", "Step"])
 
 
 def get_breakdown_df(files, agg_args, norm):